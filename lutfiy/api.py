@@ -1,6 +1,9 @@
 import os
+import threading
+import multiprocessing
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional, Union
+from typing import List, Optional, Union
 from .ngram_zwnj import GenericNGramPredictor
 from .transliterate import SouthernUzbekTransliterator
 
@@ -94,20 +97,93 @@ class Lutfiy:
             raise ValueError("Ngram model not loaded. Cannot perform ZWNJ analysis.")
         
         return self.ngram_predictor.analyze_text(text, window_size)
+    
+    def process_batch(self, texts: List[str], fix_zwnj: bool = True, transliterate: bool = False,
+                      n_workers: Optional[int] = None) -> List[str]:
+        """
+        Process many independent texts (e.g. paragraphs) in parallel
+        
+        Args:
+            texts: Input texts in Southern Uzbek Arabic script
+            fix_zwnj: Whether to fix ZWNJ placement
+            transliterate: Whether to transliterate to Latin
+            n_workers: Number of worker processes. Defaults to the CPU count;
+                1 processes the texts in the current process.
+            
+        Returns:
+            Processed texts, in the order of the input
+        """
+        if n_workers is None:
+            n_workers = os.cpu_count() or 1
+        n_workers = min(n_workers, len(texts))
+        
+        if n_workers <= 1:
+            return [self.process(text, fix_zwnj, transliterate) for text in texts]
+        
+        # Workers receive this instance once at startup (inherited without
+        # copying under fork) rather than with every chunk of texts
+        with multiprocessing.Pool(n_workers, initializer=_init_batch_worker,
+                                  initargs=(self, fix_zwnj, transliterate)) as pool:
+            return list(pool.imap(_process_in_batch_worker, texts, chunksize=64))
+
+# Per-process state for Lutfiy.process_batch workers
+_batch_worker_args = None
+
+def _init_batch_worker(lutfiy: Lutfiy, fix_zwnj: bool, transliterate: bool):
+    global _batch_worker_args
+    _batch_worker_args = (lutfiy, fix_zwnj, transliterate)
+
+def _process_in_batch_worker(text: str) -> str:
+    lutfiy, fix_zwnj, transliterate = _batch_worker_args
+    return lutfiy.process(text, fix_zwnj, transliterate)
+
+# Shared instances for the convenience functions, so the model is loaded once.
+# Instances whose model failed to load are not kept, so the next call retries.
+_default_lutfiy: Optional[Lutfiy] = None
+_path_lutfiys: 'OrderedDict[Path, Lutfiy]' = OrderedDict()  # Most recently used last
+_max_path_lutfiys = 4
+_lutfiy_lock = threading.Lock()
+_transliterator = SouthernUzbekTransliterator()
+
+def _get_lutfiy(model_path: Optional[Union[str, Path]] = None) -> Lutfiy:
+    """Return a shared Lutfiy instance for the given model path"""
+    global _default_lutfiy
+    
+    with _lutfiy_lock:
+        if model_path is None:
+            if _default_lutfiy is not None:
+                return _default_lutfiy
+            lutfiy = Lutfiy()
+            if lutfiy.ngram_predictor is not None:
+                _default_lutfiy = lutfiy
+            return lutfiy
+        
+        model_path = Path(model_path)
+        lutfiy = _path_lutfiys.get(model_path)
+        if lutfiy is not None:
+            _path_lutfiys.move_to_end(model_path)
+            return lutfiy
+        
+        lutfiy = Lutfiy(model_path)
+        if lutfiy.ngram_predictor is not None:
+            _path_lutfiys[model_path] = lutfiy
+            if len(_path_lutfiys) > _max_path_lutfiys:
+                _path_lutfiys.popitem(last=False)
+        return lutfiy
 
 # Convenience functions for quick usage
 def fix_zwnj(text: str, model_path: Optional[Union[str, Path]] = None) -> str:
     """Quick function to fix ZWNJ in text"""
-    lutfiy = Lutfiy(model_path)
+    lutfiy = _get_lutfiy(model_path)
     return lutfiy.fix_zwnj(text)
 
 def transliterate(text: str) -> str:
     """Quick function to transliterate text"""
-    lutfiy = Lutfiy()
-    return lutfiy.transliterate(text)
+    # Transliteration needs no n-gram model, so skip loading one
+    return _transliterator.transliterate(text)
 
 def process_text(text: str, fix_zwnj: bool = True, transliterate: bool = False, 
                 model_path: Optional[Union[str, Path]] = None) -> str:
     """Quick function to process text with multiple operations"""
-    lutfiy = Lutfiy(model_path)
+    lutfiy = _get_lutfiy(model_path)
     return lutfiy.process(text, fix_zwnj, transliterate)
\ No newline at end of file
@@ -2,10 +2,23 @@ import re
 import math
 import pickle
 from collections import defaultdict
-from typing import List, Dict, Optional, Union
+from typing import List, Dict, Optional, Tuple, Union
 from pathlib import Path
 
+# Options for the character after ه, in the order they are scored
+OPTIONS = ('no_change', 'insert_zwnj', 'replace_space_with_zwnj')
+NO_CHANGE, INSERT_ZWNJ, REPLACE_SPACE_WITH_ZWNJ = range(len(OPTIONS))
+
+HEH = 'ه'
+HEH_PATTERN = re.compile(HEH)
+
 class GenericNGramPredictor:
+    # Attributes derived from the counts by _build_lookup_tables
+    _DERIVED_ATTRIBUTES = (
+        '_vocab_smoothing', '_fallback_denominator', '_joint_denominator',
+        '_log_probs', '_context_log_probs', '_fallback_log_prob',
+    )
+    
     def __init__(self, n=4, model_path: Optional[Union[str, Path]] = None):
         self.n = n  # n-gram size
         self.ngram_counts = defaultdict(int)
@@ -15,6 +28,14 @@ class GenericNGramPredictor:
         self.total_ngrams = 0
         self.is_trained = False
         
+        # Derived from the counts by _build_lookup_tables
+        self._vocab_smoothing = 0.0
+        self._fallback_denominator = 0.0
+        self._joint_denominator = 0.0
+        self._log_probs = {}
+        self._context_log_probs = {}
+        self._fallback_log_prob = 0.0
+        
         # Load model if path is provided
         if model_path is not None:
             self.load_model(model_path)
@@ -90,19 +111,27 @@ class GenericNGramPredictor:
             with open(model_path, "rb") as f:
                 loaded_model = pickle.load(f)
             
-            # Copy attributes from loaded model
+            # Models are saved as a plain dict of attributes; older models
+            # are pickled GenericNGramPredictor instances
             if isinstance(loaded_model, GenericNGramPredictor):
-                self.n = loaded_model.n
-                self.ngram_counts = loaded_model.ngram_counts
-                self.context_counts = loaded_model.context_counts
-                self.vocab = loaded_model.vocab
-                self.smoothing = loaded_model.smoothing
-                self.total_ngrams = loaded_model.total_ngrams
-                self.is_trained = True
-                # print(f"Successfully loaded model from {model_path}")
-                # print(f"Model info: n={self.n}, vocab_size={len(self.vocab)}, total_ngrams={self.total_ngrams}")
+                state = vars(loaded_model)
+            elif isinstance(loaded_model, dict) and 'ngram_counts' in loaded_model:
+                state = loaded_model
             else:
-                raise ValueError("Loaded object is not a GenericNGramPredictor instance")
+                raise ValueError("Loaded object is not a GenericNGramPredictor model")
+            
+            # Copy attributes from loaded model
+            self.n = state['n']
+            # Plain dicts: lookups in a defaultdict would insert zero counts
+            self.ngram_counts = dict(state['ngram_counts'])
+            self.context_counts = dict(state['context_counts'])
+            self.vocab = set(state['vocab'])
+            self.smoothing = state['smoothing']
+            self.total_ngrams = state['total_ngrams']
+            self.is_trained = True
+            self._build_lookup_tables()
+            # print(f"Successfully loaded model from {model_path}")
+            # print(f"Model info: n={self.n}, vocab_size={len(self.vocab)}, total_ngrams={self.total_ngrams}")
                 
         except Exception as e:
             raise ValueError(f"Error loading model from {model_path}: {e}")
@@ -120,9 +149,20 @@ class GenericNGramPredictor:
         model_path = Path(model_path)
         model_path.parent.mkdir(parents=True, exist_ok=True)
         
+        # Plain builtin containers unpickle much faster than the instance with
+        # its defaultdicts; zero counts left behind by lookups are dropped
+        state = {
+            'n': self.n,
+            'ngram_counts': {ngram: count for ngram, count in self.ngram_counts.items() if count},
+            'context_counts': {context: count for context, count in self.context_counts.items() if count},
+            'vocab': self.vocab,
+            'smoothing': self.smoothing,
+            'total_ngrams': self.total_ngrams,
+        }
+        
         try:
             with open(model_path, "wb") as f:
-                pickle.dump(self, f)
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
             print(f"Model saved to {model_path}")
         except Exception as e:
             raise ValueError(f"Error saving model to {model_path}: {e}")
@@ -156,11 +196,64 @@ class GenericNGramPredictor:
                     context = ngram[:-1]
                     self.context_counts[context] += 1
         
+        # Counting is done, so stop lookups from inserting zero counts
+        self.ngram_counts = dict(self.ngram_counts)
+        self.context_counts = dict(self.context_counts)
+        
         self.is_trained = True
+        self._build_lookup_tables()
         print(f"Training completed. Vocabulary size: {len(self.vocab)}")
         print(f"Total n-grams: {self.total_ngrams}")
         print(f"Unique n-grams: {len(self.ngram_counts)}")
     
+    def __getstate__(self):
+        # Lookup tables are derived from the counts and rebuilt on load
+        state = self.__dict__.copy()
+        for key in self._DERIVED_ATTRIBUTES:
+            state.pop(key, None)
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.is_trained:
+            self._build_lookup_tables()
+    
+    def _build_lookup_tables(self):
+        """
+        Precompute smoothing denominators and conditional log-probabilities
+        
+        Counts never change after training or loading, so log P(last_char | context)
+        is computed once per observed n-gram instead of on every lookup. Unseen
+        n-grams fall back to the smoothed probability for their context, or to
+        the unigram fallback when the context is unseen as well.
+        """
+        smoothing = self.smoothing
+        vocab_size = len(self.vocab)
+        vocab_smoothing = smoothing * vocab_size
+        fallback_denominator = self.total_ngrams + vocab_smoothing
+        context_counts = self.context_counts
+        
+        self._vocab_smoothing = vocab_smoothing
+        self._fallback_denominator = fallback_denominator
+        self._joint_denominator = self.total_ngrams + smoothing * vocab_size ** self.n
+        
+        log_probs = {}
+        for ngram, ngram_count in self.ngram_counts.items():
+            context_count = context_counts.get(ngram[:-1], 0)
+            if context_count == 0:
+                prob = (ngram_count + smoothing) / fallback_denominator
+            else:
+                prob = (ngram_count + smoothing) / (context_count + vocab_smoothing)
+            log_probs[ngram] = math.log(prob)
+        
+        self._log_probs = log_probs
+        self._context_log_probs = {
+            context: math.log(smoothing / (context_count + vocab_smoothing))
+            for context, context_count in context_counts.items()
+            if context_count != 0
+        }
+        self._fallback_log_prob = math.log(smoothing / fallback_denominator)
+    
     def get_ngram_probability(self, ngram: str, given_context: Optional[str] = None) -> float:
         """
         Calculate probability of n-gram
@@ -172,21 +265,18 @@ class GenericNGramPredictor:
             
         if given_context is not None:
             # Conditional probability P(last_char | context)
-            context_count = self.context_counts[given_context]
-            ngram_count = self.ngram_counts[ngram]
+            context_count = self.context_counts.get(given_context, 0)
+            ngram_count = self.ngram_counts.get(ngram, 0)
             
             if context_count == 0:
                 # Use unigram probability as fallback
-                vocab_size = len(self.vocab)
-                return (ngram_count + self.smoothing) / (self.total_ngrams + self.smoothing * vocab_size)
+                return (ngram_count + self.smoothing) / self._fallback_denominator
             
             # Apply Laplace smoothing
-            vocab_size = len(self.vocab)
-            return (ngram_count + self.smoothing) / (context_count + self.smoothing * vocab_size)
+            return (ngram_count + self.smoothing) / (context_count + self._vocab_smoothing)
         else:
             # Joint probability P(ngram)
-            vocab_size = len(self.vocab) ** self.n
-            return (self.ngram_counts[ngram] + self.smoothing) / (self.total_ngrams + self.smoothing * vocab_size)
+            return (self.ngram_counts.get(ngram, 0) + self.smoothing) / self._joint_denominator
     
     def get_sequence_score(self, text: str, start_pos: int, window_size: int) -> float:
         """
@@ -203,21 +293,37 @@ class GenericNGramPredictor:
             # For sequences shorter than n, use what we have
             return self.get_ngram_probability(sequence)
         
-        total_log_prob = 0
-        count = 0
+        contributions = self.get_log_contributions(sequence, 0, len(sequence))
         
-        # Extract all n-grams from the sequence
-        for i in range(len(sequence) - self.n + 1):
-            ngram = sequence[i:i + self.n]
-            context = ngram[:-1]
-            prob = self.get_ngram_probability(ngram, context)
-            total_log_prob += math.log(prob)
-            count += 1
-        
-        if count == 0:
+        if not contributions:
             return self.smoothing
         
-        return math.exp(total_log_prob / count)
+        return math.exp(sum(contributions) / len(contributions))
+    
+    def get_log_contributions(self, text: str, start_pos: int, end_pos: int) -> List[float]:
+        """
+        Get conditional log-probability of every n-gram in text[start_pos:end_pos]
+        """
+        if not self.is_trained:
+            raise ValueError("Model must be trained or loaded before use")
+        
+        # Conditional log-probabilities are precomputed (see
+        # _build_lookup_tables), so each n-gram is a dict lookup
+        n = self.n
+        log_probs = self._log_probs
+        context_log_probs = self._context_log_probs
+        fallback_log_prob = self._fallback_log_prob
+        
+        contributions = []
+        for i in range(start_pos, min(end_pos, len(text)) - n + 1):
+            ngram = text[i:i + n]
+            log_prob = log_probs.get(ngram)
+            if log_prob is None:
+                # Unseen n-gram: smoothed probability given its context
+                log_prob = context_log_probs.get(ngram[:-1], fallback_log_prob)
+            contributions.append(log_prob)
+        
+        return contributions
     
     def decide_after_heh(self, text: str, heh_pos: int, window_size: int = None) -> Dict[str, float]:
         """
@@ -234,26 +340,67 @@ class GenericNGramPredictor:
         if window_size is None:
             window_size = self.n * 2  # Default window size
         
+        scores = self._score_options(text, heh_pos, window_size)
+        
+        # Options that do not apply are scored -inf
+        return {
+            option: score
+            for option, score in zip(OPTIONS, scores)
+            if score != -math.inf
+        }
+    
+    def _score_options(self, text: str, heh_pos: int, window_size: int) -> Tuple[float, float, float]:
+        """
+        Score every option of decide_after_heh, in the order of OPTIONS
+        
+        Options that do not apply are scored -inf, so the best option is
+        simply the index of the maximum score.
+        """
         zwnj = '\u200c'
-        options = {}
+        n = self.n
+        sequence = text[heh_pos:heh_pos + window_size]
+        
+        # The scored window starts at ه, so the alternatives are built from
+        # the window alone instead of copying the whole text
+        heh = text[heh_pos:heh_pos + 1]
+        text_with_zwnj = heh + zwnj + text[heh_pos + 1:heh_pos + window_size]
+        text_replace_space = heh + zwnj + text[heh_pos + 2:heh_pos + window_size]
+        has_space = heh_pos + 1 < len(text) and text[heh_pos + 1] == ' '
+        
+        if len(sequence) < max(n, 2):
+            # Too short for the options to share n-grams (only at the very
+            # end of the text), so score each option directly
+            original_score = self.get_sequence_score(sequence, 0, window_size)
+            
+            zwnj_score = -math.inf
+            if heh_pos + 1 <= len(text):
+                zwnj_score = self.get_sequence_score(text_with_zwnj, 0, window_size + 1)
+            
+            space_replace_score = -math.inf
+            if has_space:
+                space_replace_score = self.get_sequence_score(text_replace_space, 0, window_size)
+            
+            return original_score, zwnj_score, space_replace_score
         
         # Option 1: Leave as is (no change)
-        original_score = self.get_sequence_score(text, heh_pos, window_size)
-        options['no_change'] = original_score
+        contributions = self.get_log_contributions(sequence, 0, len(sequence))
+        original_score = math.exp(sum(contributions) / len(contributions))
+        
+        # Only the n-grams starting at ه or right after it contain the ZWNJ;
+        # the remaining n-grams of options 2 and 3 are n-grams of the original
+        # window, so only those two are looked up
         
         # Option 2: Insert ZWNJ after ه
-        if heh_pos + 1 <= len(text):
-            text_with_zwnj = text[:heh_pos + 1] + zwnj + text[heh_pos + 1:]
-            zwnj_score = self.get_sequence_score(text_with_zwnj, heh_pos, window_size + 1)
-            options['insert_zwnj'] = zwnj_score
+        zwnj_contributions = self.get_log_contributions(text_with_zwnj, 0, n + 1) + contributions[1:]
+        zwnj_score = math.exp(sum(zwnj_contributions) / len(zwnj_contributions))
         
         # Option 3: Replace space with ZWNJ (if there's a space after ه)
-        if (heh_pos + 1 < len(text) and text[heh_pos + 1] == ' '):
-            text_replace_space = text[:heh_pos + 1] + zwnj + text[heh_pos + 2:]
-            space_replace_score = self.get_sequence_score(text_replace_space, heh_pos, window_size)
-            options['replace_space_with_zwnj'] = space_replace_score
+        space_replace_score = -math.inf
+        if has_space:
+            space_contributions = self.get_log_contributions(text_replace_space, 0, n + 1) + contributions[2:]
+            space_replace_score = math.exp(sum(space_contributions) / len(space_contributions))
         
-        return options
+        return original_score, zwnj_score, space_replace_score
     
     def process_text(self, text: str, window_size: int = None) -> str:
         """
@@ -266,30 +413,39 @@ class GenericNGramPredictor:
             window_size = self.n * 2
         
         zwnj = '\u200c'
-        result = list(text)  # Work with list for easier manipulation
-        offset = 0  # Track position changes due to insertions
         
-        # Find all positions of ه
-        heh_positions = [i for i, char in enumerate(text) if char == 'ه']
-        
-        for original_pos in heh_positions:
-            current_pos = original_pos + offset
-            current_text = ''.join(result)
-            
-            # Get scores for different options
-            options = self.decide_after_heh(current_text, current_pos, window_size)
-            
-            # Find best option
-            best_option = max(options.keys(), key=lambda k: options[k])
+        # Find all positions of ه, and the window starting at each one (plus
+        # the character after ه) that its decision depends on
+        heh_positions = [match.start() for match in HEH_PATTERN.finditer(text)]
+        windows = [text[pos:pos + window_size + 1] for pos in heh_positions]
+        
+        # The scored window only extends forward from ه, while every edit is
+        # made right after an earlier ه, so no decision depends on another and
+        # all of them can be taken on the original text as one batch. Windows
+        # repeat often (suffixes, function words), so each distinct window is
+        # scored only once.
+        decisions: Dict[str, int] = {}  # Best option index per window text
+        for window_text in dict.fromkeys(windows):
+            scores = self._score_options(window_text, 0, window_size)
             
-            # Apply the best option
-            if best_option == 'insert_zwnj':
-                result.insert(current_pos + 1, zwnj)
-                offset += 1
-            elif best_option == 'replace_space_with_zwnj':
-                if current_pos + 1 < len(result) and result[current_pos + 1] == ' ':
-                    result[current_pos + 1] = zwnj
+            # Find best option (the first one on ties, as in analyze_text)
+            decisions[window_text] = scores.index(max(scores))
+        best_options = [decisions[window_text] for window_text in windows]
+        
+        # Apply the best options, copying the text between edits as is
+        result = []
+        last_pos = 0
+        for pos, best_option in zip(heh_positions, best_options):
+            if best_option == INSERT_ZWNJ:
+                result.append(text[last_pos:pos + 1])
+                result.append(zwnj)
+                last_pos = pos + 1
+            elif best_option == REPLACE_SPACE_WITH_ZWNJ:
+                result.append(text[last_pos:pos + 1])
+                result.append(zwnj)
+                last_pos = pos + 2
             # For 'no_change', do nothing
+        result.append(text[last_pos:])
         
         return ''.join(result)
     
@@ -304,7 +460,7 @@ class GenericNGramPredictor:
             window_size = self.n * 2
         
         results = []
-        heh_positions = [i for i, char in enumerate(text) if char == 'ه']
+        heh_positions = [match.start() for match in HEH_PATTERN.finditer(text)]
         
         for pos in heh_positions:
             options = self.decide_after_heh(text, pos, window_size)
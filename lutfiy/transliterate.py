@@ -1,112 +1,161 @@
+import re
+
+def _trie_pattern(node):
+    """
+    Build a regex matching the longest key stored in a character trie
+    
+    Children are tried before the node's own terminal, so the engine only
+    falls back to a shorter key when the longer continuation fails.
+    """
+    alternatives = []
+    for char, child in node.items():
+        if char is None:
+            continue
+        child_pattern = _trie_pattern(child)
+        if child_pattern:
+            alternatives.append(f"{re.escape(char)}(?:{child_pattern})")
+        else:
+            alternatives.append(re.escape(char))
+    
+    if alternatives and None in node:
+        alternatives.append('')
+    
+    return '|'.join(alternatives)
+
+def _build_trie(mappings):
+    """
+    Build a character trie of the mapping keys
+    
+    The output for a key is stored under None at the node where it ends.
+    """
+    trie = {}
+    for key, value in mappings.items():
+        node = trie
+        for char in key:
+            node = node.setdefault(char, {})
+        node[None] = value
+    
+    return trie
+
+class _PrintableTable(dict):
+    """
+    str.translate table that deletes non-printable characters
+    
+    Any character can reach the output unmapped, so entries are filled in
+    as code points are first seen instead of covering all of Unicode.
+    """
+    
+    def __missing__(self, codepoint):
+        value = codepoint if chr(codepoint).isprintable() else None
+        self[codepoint] = value
+        return value
+
 class SouthernUzbekTransliterator:
-    def __init__(self):
-        # Vowel mappings (including diacritics)
-        self.vowels = {
-            # Vowels with alif
-            'اَ': 'a',
-            'آ': 'o',
-            'اِیـ': 'i',
-            'اِی': 'i',
-            'اېـ': 'e',
-            'اې': 'e',
-            'اۉ': 'oʻ',
-            'اُو': 'u',
-            'او': 'u',
-            'اِ': 'i',
-            'اُ': 'u',
-            
-            # Vowels without alif
-            'ـَه': 'a',
-            'ـه': 'a',
-            'ـَ': 'a',
-            'ـ': 'a',
-            'ـا': 'o',
-            'ـِی': 'i',
-            'ـې': 'e',
-            'ـِه': 'e',
-            'ـِ': 'i',
-            'ي': 'i',
-            'ـُو': 'u',
-            'ـۉ': 'oʻ',
-            'ـُ': 'u',
-            
-            # Standalone vowels
-            'ا': 'a',
-            'ې': 'e',
-            'ۉ': 'oʻ',
-            'ی': 'y',
-            'و': 'v',
-        }
-        
-        # Consonant mappings
-        self.consonants = {
-            # Final, Medial, Initial, Isolated forms
-            'ب': 'b', 'بـ': 'b', 'ـبـ': 'b', 'ـب': 'b',
-            'پ': 'p', 'پـ': 'p', 'ـپـ': 'p', 'ـپ': 'p',
-            'ت': 't', 'تـ': 't', 'ـتـ': 't', 'ـت': 't',
-            'ث': 's', 'ثـ': 's', 'ـثـ': 's', 'ـث': 's',
-            'ج': 'j', 'جـ': 'j', 'ـجـ': 'j', 'ـج': 'j',
-            'چ': 'ch', 'چـ': 'ch', 'ـچـ': 'ch', 'ـچ': 'ch',
-            'ح': 'h', 'حـ': 'h', 'ـحـ': 'h', 'ـح': 'h',
-            'خ': 'x', 'خـ': 'x', 'ـخـ': 'x', 'ـخ': 'x',
-            'د': 'd', 'ـد': 'd',
-            'ذ': 'z', 'ـذ': 'z',
-            'ر': 'r', 'ـر': 'r',
-            'ز': 'z', 'ـز': 'z',
-            'ژ': 'j', 'ـژ': 'j',
-            'س': 's', 'سـ': 's', 'ـسـ': 's', 'ـس': 's',
-            'ش': 'sh', 'شـ': 'sh', 'ـشـ': 'sh', 'ـش': 'sh',
-            'ص': 's', 'صـ': 's', 'ـصـ': 's', 'ـص': 's',
-            'ض': 'z', 'ضـ': 'z', 'ـضـ': 'z', 'ـض': 'z',
-            'ط': 't', 'طـ': 't', 'ـطـ': 't', 'ـط': 't',
-            'ظ': 'z', 'ظـ': 'z', 'ـظـ': 'z', 'ـظ': 'z',
-            'ع': 'ʻ', 'عـ': 'ʻ', 'ـعـ': 'ʻ', 'ـع': 'ʻ',
-            'غ': 'gʻ', 'غـ': 'gʻ', 'ـغـ': 'gʻ', 'ـغ': 'gʻ',
-            'ف': 'f', 'فـ': 'f', 'ـفـ': 'f', 'ـف': 'f',
-            'ق': 'q', 'قـ': 'q', 'ـقـ': 'q', 'ـق': 'q',
-            'ک': 'k', 'کـ': 'k', 'ـکـ': 'k', 'ـک': 'k',
-            'گ': 'g', 'گـ': 'g', 'ـگـ': 'g', 'ـگ': 'g',
-            'ل': 'l', 'لـ': 'l', 'ـلـ': 'l', 'ـل': 'l',
-            'م': 'm', 'مـ': 'm', 'ـمـ': 'm', 'ـم': 'm',
-            'ن': 'n', 'نـ': 'n', 'ـنـ': 'n', 'ـن': 'n',
-            'نگ': 'ng', 'نگـ': 'ng', 'ـنگـ': 'ng', 'ـنگ': 'ng',
-            'و': 'v', 'ـو': 'v',
-            'ه': 'h', 'هـ': 'h', 'ـهـ': 'h', 'ـه': 'h',
-            'ی': 'i', 'یـ': 'i', 'ـیـ': 'i', 'ـی': 'i',
-            'ء': 'ʻ', 'ئـ': 'ʻ', 'ـئـ': 'ʻ', 'أ': 'ʻ', 'ـأ': 'ʻ', 'ؤ': 'ʻ', 'ـؤ': 'ʻ',
-        }
+    # Mappings, trie and pattern are built once at import and shared by all
+    # instances
+    
+    # Vowel mappings (including diacritics)
+    vowels = {
+        # Vowels with alif
+        'اَ': 'a',
+        'آ': 'o',
+        'اِیـ': 'i',
+        'اِی': 'i',
+        'اېـ': 'e',
+        'اې': 'e',
+        'اۉ': 'oʻ',
+        'اُو': 'u',
+        'او': 'u',
+        'اِ': 'i',
+        'اُ': 'u',
         
-        # Combine all mappings
-        self.all_mappings = {**self.vowels, **self.consonants}
+        # Vowels without alif
+        'ـَه': 'a',
+        'ـه': 'a',
+        'ـَ': 'a',
+        'ـ': 'a',
+        'ـا': 'o',
+        'ـِی': 'i',
+        'ـې': 'e',
+        'ـِه': 'e',
+        'ـِ': 'i',
+        'ي': 'i',
+        'ـُو': 'u',
+        'ـۉ': 'oʻ',
+        'ـُ': 'u',
         
-        # Sort by length (longest first) to handle multi-character sequences
-        self.sorted_keys = sorted(self.all_mappings.keys(), key=len, reverse=True)
+        # Standalone vowels
+        'ا': 'a',
+        'ې': 'e',
+        'ۉ': 'oʻ',
+        'ی': 'y',
+        'و': 'v',
+    }
+    
+    # Consonant mappings
+    consonants = {
+        # Final, Medial, Initial, Isolated forms
+        'ب': 'b', 'بـ': 'b', 'ـبـ': 'b', 'ـب': 'b',
+        'پ': 'p', 'پـ': 'p', 'ـپـ': 'p', 'ـپ': 'p',
+        'ت': 't', 'تـ': 't', 'ـتـ': 't', 'ـت': 't',
+        'ث': 's', 'ثـ': 's', 'ـثـ': 's', 'ـث': 's',
+        'ج': 'j', 'جـ': 'j', 'ـجـ': 'j', 'ـج': 'j',
+        'چ': 'ch', 'چـ': 'ch', 'ـچـ': 'ch', 'ـچ': 'ch',
+        'ح': 'h', 'حـ': 'h', 'ـحـ': 'h', 'ـح': 'h',
+        'خ': 'x', 'خـ': 'x', 'ـخـ': 'x', 'ـخ': 'x',
+        'د': 'd', 'ـد': 'd',
+        'ذ': 'z', 'ـذ': 'z',
+        'ر': 'r', 'ـر': 'r',
+        'ز': 'z', 'ـز': 'z',
+        'ژ': 'j', 'ـژ': 'j',
+        'س': 's', 'سـ': 's', 'ـسـ': 's', 'ـس': 's',
+        'ش': 'sh', 'شـ': 'sh', 'ـشـ': 'sh', 'ـش': 'sh',
+        'ص': 's', 'صـ': 's', 'ـصـ': 's', 'ـص': 's',
+        'ض': 'z', 'ضـ': 'z', 'ـضـ': 'z', 'ـض': 'z',
+        'ط': 't', 'طـ': 't', 'ـطـ': 't', 'ـط': 't',
+        'ظ': 'z', 'ظـ': 'z', 'ـظـ': 'z', 'ـظ': 'z',
+        'ع': 'ʻ', 'عـ': 'ʻ', 'ـعـ': 'ʻ', 'ـع': 'ʻ',
+        'غ': 'gʻ', 'غـ': 'gʻ', 'ـغـ': 'gʻ', 'ـغ': 'gʻ',
+        'ف': 'f', 'فـ': 'f', 'ـفـ': 'f', 'ـف': 'f',
+        'ق': 'q', 'قـ': 'q', 'ـقـ': 'q', 'ـق': 'q',
+        'ک': 'k', 'کـ': 'k', 'ـکـ': 'k', 'ـک': 'k',
+        'گ': 'g', 'گـ': 'g', 'ـگـ': 'g', 'ـگ': 'g',
+        'ل': 'l', 'لـ': 'l', 'ـلـ': 'l', 'ـل': 'l',
+        'م': 'm', 'مـ': 'm', 'ـمـ': 'm', 'ـم': 'm',
+        'ن': 'n', 'نـ': 'n', 'ـنـ': 'n', 'ـن': 'n',
+        'نگ': 'ng', 'نگـ': 'ng', 'ـنگـ': 'ng', 'ـنگ': 'ng',
+        'و': 'v', 'ـو': 'v',
+        'ه': 'h', 'هـ': 'h', 'ـهـ': 'h', 'ـه': 'h',
+        'ی': 'i', 'یـ': 'i', 'ـیـ': 'i', 'ـی': 'i',
+        'ء': 'ʻ', 'ئـ': 'ʻ', 'ـئـ': 'ʻ', 'أ': 'ʻ', 'ـأ': 'ʻ', 'ؤ': 'ʻ', 'ـؤ': 'ʻ',
+    }
+    
+    # Combine all mappings
+    all_mappings = {**vowels, **consonants}
+    
+    # Sort by length (longest first) to handle multi-character sequences
+    sorted_keys = sorted(all_mappings.keys(), key=len, reverse=True)
+    
+    # Character trie of all keys
+    _trie = _build_trie(all_mappings)
+    
+    # Matching the trie as a regex lets the engine branch on one character
+    # per level instead of retrying every key at each position. Any other
+    # character is matched on its own, so the text splits into tokens.
+    _pattern = re.compile(_trie_pattern(_trie) + '|.', re.DOTALL)
+    _lookup = all_mappings.get
+    
+    # str.translate table dropping non-printable characters
+    _printable_table = _PrintableTable()
     
     def transliterate(self, arabic_text):
         """
         Transliterate Southern Uzbek Arabic script to Latin script
         """
-        result = ""
-        i = 0
-        
-        while i < len(arabic_text):
-            found = False
-            
-            # Try to match the longest possible sequence first
-            for key in self.sorted_keys:
-                if i + len(key) <= len(arabic_text):
-                    if arabic_text[i:i+len(key)] == key:
-                        result += self.all_mappings[key]
-                        i += len(key)
-                        found = True
-                        break
-            
-            if not found:
-                # If no mapping found, keep the original character
-                result += arabic_text[i]
-                i += 1
-        
-        return result
+        # Map every token in C via dict.get(token, token), which keeps
+        # characters without a mapping as is
+        tokens = self._pattern.findall(arabic_text)
+        return ''.join(map(self._lookup, tokens, tokens))
     
     def transliterate_to_latin(self, word):
         """
@@ -115,6 +164,7 @@ class SouthernUzbekTransliterator:
         transliterated = self.transliterate(word)
         
         # Basic cleanup - remove extra spaces and diacritics that weren't mapped
-        transliterated = ''.join(char for char in transliterated if char.isprintable())
+        if not transliterated.isprintable():
+            transliterated = transliterated.translate(self._printable_table)
         
         return transliterated
\ No newline at end of file